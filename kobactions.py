@@ -28,6 +28,7 @@ kobactions.py
 Handle actions for controls on main MKOB window
 """
 import os
+import queue
 import tkinter as tk
 import tkinter.messagebox as mb
 import tkinter.filedialog as fd
@@ -45,6 +46,11 @@ global preferencesDialog
 preferencesDialog = None
 kw = None  # initialized by KOBWindow
 
+# Data for events generated by other threads is passed through these queues rather
+# than as event data, which Tk would convert to and from a string.
+__emit_code_q = queue.SimpleQueue()  # (code, code_source) to be emitted
+__reader_text_q = queue.SimpleQueue()  # text to be appended to the reader window
+
 ####
 #### Menu item handlers
 ####
@@ -92,6 +98,8 @@ def doFilePreferences():
     preferencesDialog.root.lift()
 
 def doFileExit():
+    if km.Recorder:
+        km.Recorder.close()
     kw.root.destroy()
     kw.root.quit()
 
@@ -117,8 +125,14 @@ def doWPM(event=None):
     new_wpm = kw.get_WPM()
     config.set_text_speed(new_wpm)
     config.save_config()
-    km.Sender = morse.Sender(wpm=int(new_wpm), cwpm=int(config.min_char_speed), codeType=config.code_type, spacing=config.spacing)
-    km.Reader = morse.Reader(wpm=int(new_wpm), cwpm=int(config.min_char_speed), codeType=config.code_type, callback=km.readerCallback)
+    if km.Sender:
+        km.Sender.setWPM(wpm=int(new_wpm), cwpm=int(config.min_char_speed), codeType=config.code_type, spacing=config.spacing)
+    else:
+        km.Sender = morse.Sender(wpm=int(new_wpm), cwpm=int(config.min_char_speed), codeType=config.code_type, spacing=config.spacing)
+    if km.Reader:
+        km.Reader.reset(wpm=int(new_wpm), cwpm=int(config.min_char_speed), codeType=config.code_type)
+    else:
+        km.Reader = morse.Reader(wpm=int(new_wpm), cwpm=int(config.min_char_speed), codeType=config.code_type, callback=km.readerCallback)
 
 def doWireNo(event=None):
     wire = kw.get_wireNo()
@@ -133,7 +147,7 @@ def doConnect():
         return # If the recorder is playing a recording do not allow connection
     km.toggle_connect()
     color = 'red' if km.connected else 'white'
-    kw.cvsConnect.create_rectangle(0, 0, 20, 20, fill=color)
+    kw.cvsConnect.itemconfigure(kw.rectConnect, fill=color)
 
 ####
 #### Trigger event messages ###
@@ -155,13 +169,15 @@ def trigger_emit_key_code(code: list):
     """
     Generate an event to emit the code sequence originating from the key.
     """
-    kw.root.event_generate(kobevents.EVENT_EMIT_KEY_CODE, when='tail', data=code)
+    __emit_code_q.put((code, kob.CodeSource.key))
+    kw.root.event_generate(kobevents.EVENT_EMIT_KEY_CODE, when='tail')
 
 def trigger_emit_kb_code(code: list):
     """
     Generate an event to emit the code sequence originating from the keyboard.
     """
-    kw.root.event_generate(kobevents.EVENT_EMIT_KB_CODE, when='tail', data=code)
+    __emit_code_q.put((code, kob.CodeSource.keyboard))
+    kw.root.event_generate(kobevents.EVENT_EMIT_KB_CODE, when='tail')
 
 def trigger_player_wire_change(id: int):
     """
@@ -174,7 +190,8 @@ def trigger_reader_append_text(text: str):
     """
     Generate an event to add text to the reader window.
     """
-    kw.root.event_generate(kobevents.EVENT_READER_APPEND_TEXT, when='tail', data=text)
+    __reader_text_q.put(text)
+    kw.root.event_generate(kobevents.EVENT_READER_APPEND_TEXT, when='tail')
 
 def trigger_reader_clear():
     """
@@ -217,29 +234,32 @@ def handle_circuit_open(event):
     """
     km.circuit_closer_closed(False)
 
-def handle_emit_key_code(event_data):
+def handle_emit_key_code(event):
     """
     Emit code originating from the key
     """
-    handle_emit_code(event_data, kob.CodeSource.key)
+    handle_emit_code()
 
-def handle_emit_kb_code(event_data):
+def handle_emit_kb_code(event):
     """
     Emit code originating from the keyboard
     """
-    handle_emit_code(event_data, kob.CodeSource.keyboard)
+    handle_emit_code()
 
-def handle_emit_code(event_data, code_source):
+def handle_emit_code():
     """
-    Emit a code sequence.
+    Emit the code sequences waiting in the emit queue.
     
-    event_data is the code sequence list as a string (ex: '(-17290 89)')
-    It is converted to a list of integer values to emit.
+    Code from the key and the keyboard share the queue, so all of the waiting 
+    sequences are emitted in the order they were triggered.
     """
-    data = event_data.strip(')(')
-    if (data and (not data.isspace())):
-        code = tuple(map(int, data.split(', ')))
-        km.__emit_code(code, code_source)
+    while True:
+        try:
+            code, code_source = __emit_code_q.get_nowait()
+        except queue.Empty:
+            return
+        if code:
+            km.__emit_code(code, code_source)
 
 def handle_escape(event):
     """
@@ -331,14 +351,19 @@ def handle_reader_clear(event):
     """
     krdr.handle_clear()
 
-def handle_reader_append_text(event_data):
+def handle_reader_append_text(event):
     """
     Handle a <<Reader_Append_Text>> message by:
-    1. Telling the reader window to append the text in the event_data
+    1. Telling the reader window to append the text waiting in the reader text queue
 
-    event_data is the text to append
+    event has no meaningful information
     """
-    krdr.handle_append_text(event_data)
+    while True:
+        try:
+            text = __reader_text_q.get_nowait()
+        except queue.Empty:
+            return
+        krdr.handle_append_text(text)
 
 def handle_player_wire_change(event_data):
     """
@@ -28,7 +28,8 @@ kobmain.py
 Handle the flow of Morse code throughout the program.
 """
 
-import time
+import queue
+import threading
 from datetime import datetime
 
 from pykob import kob, morse, internet, config, recorder, log
@@ -37,6 +38,9 @@ import kobstationlist
 import kobkeyboard
 
 NNBSP = "\u202f"  # narrow no-break space
+LONG_PAUSE_TEXT = " * "  # displayed before a character following a very long pause
+WORD_SPACE_TEXT = "     "  # displayed before a character following a long space
+SPACE_TEXT = tuple(n * " " for n in range(6))  # displayed for spacing of 0 to 5 space widths
 
 KOB = None
 Sender = None
@@ -53,6 +57,8 @@ unlatch_code = (-0x7fff, +2)  # code sequence to unlatch (open)
 
 sender_ID = ""
 
+__sounder_q = queue.Queue()  # (code, code_source) to be sounded by the 'KOB-Sounder' thread
+
 def __set_local_loop_active(state):
     """
     Set local_loop_active state
@@ -71,20 +77,27 @@ def __emit_code(code, code_source):
     2. Send code to the wire if connected
 
     This is used indirectly from the key or the keyboard threads to emit code once they
-    determine it should be emitted.
+    determine it should be emitted. Sounding the code is done by those threads, so the
+    GUI thread isn't blocked for the duration of the code sequence.
 
     It should be called by an event handler in response to a 'EVENT_EMIT_KEY_CODE' or
     'EVENT_EMIT_KB_CODE' message.
     """
-    global connected
-    update_sender(config.station)
+    station = config.station
+    if station != sender_ID:
+        update_sender(station)
     Reader.decode(code)
     Recorder.record(code, code_source) # ZZZ ToDo: option to enable/disable recording
-    if config.local:
-        KOB.soundCode(code, code_source)
     if connected and config.remote:
         Internet.write(code)
 
+def __local_code_allowed():
+    """
+    True if code from the key or keyboard should be emitted. That is, 
+    the circuit is open and a remote station isn't sending.
+    """
+    return local_loop_active and not internet_station_active
+
 def from_key(code):
     """
     Handle inputs received from the external key.
@@ -95,16 +108,18 @@ def from_key(code):
 
     Called from the 'KOB-KeyRead' thread.
     """
-    global internet_station_active, local_loop_active
     if len(code) > 0:
-        if code[-1] == 1: # special code for closer/circuit closed
+        last = code[-1]
+        if last == 1: # special code for closer/circuit closed
             ka.trigger_circuit_close()
             return
-        elif code[-1] == 2: # special code for closer/circuit open
+        elif last == 2: # special code for closer/circuit open
             ka.trigger_circuit_open()
             return
-    if not internet_station_active and local_loop_active:
+    if __local_code_allowed():
         ka.trigger_emit_key_code(code)
+        if config.local:
+            __sounder_q.put((code, kob.CodeSource.key)) # Don't hold up reading the key
 
 def from_keyboard(code):
     """
@@ -113,9 +128,10 @@ def from_keyboard(code):
 
     Called from the 'Keyboard-Send' thread.
     """
-    global internet_station_active, local_loop_active
-    if not internet_station_active and local_loop_active:
+    if __local_code_allowed():
         ka.trigger_emit_kb_code(code)
+        if config.local:
+            KOB.soundCode(code, kob.CodeSource.keyboard) # Sounding paces the keyboard sender
 
 def from_internet(code):
     """handle inputs received from the internet"""
@@ -154,7 +170,7 @@ def circuit_closer_closed(state):
     if not internet_station_active:
         if config.local:
             ka.handle_sender_update(config.station) # Okay to call 'handle_...' as this is run on the main thread
-            KOB.soundCode(code, kob.CodeSource.key)
+            __sounder_q.put((code, kob.CodeSource.key)) # Keep in order with code from the key
             Reader.decode(code)
         Recorder.record(code, kob.CodeSource.local)
     if connected and config.remote:
@@ -212,7 +228,15 @@ def change_wire():
     disconnect()
     Recorder.wire = config.wire
     if was_connected:
-        time.sleep(0.350) # Needed to allow UTP packets to clear
+        ka.kw.root.after(350, __reconnect) # Delay needed to allow UTP packets to clear
+
+def __reconnect():
+    """
+    Connect to the current wire if not already connected.
+
+    Scheduled on the GUI thread to reconnect after the wire is changed.
+    """
+    if not connected:
         toggle_connect()
 
     
@@ -230,15 +254,14 @@ def update_sender(id):
 ##                wpm=config.text_speed, codeType=config.code_type,
 ##                callback=readerCallback)  # reset to nominal code speed
 
-def readerCallback(char, spacing):
-    """display characters returned from the decoder"""
-    Recorder.record([], '', text=char)
-    if config.code_type == config.CodeType.american:
-        sp = (spacing - 0.25) / 1.25  # adjust for American Morse spacing
-    else:
-        sp = spacing
+def __spacing_text(sp, char):
+    """
+    Return the text to display ahead of a decoded character.
+
+    sp is the spacing before the character in space widths (adjusted for the code type).
+    """
     if sp > 100:
-        txt = "" if char == "__" else " * "
+        return "" if char == "__" else LONG_PAUSE_TEXT
 ## ZZZ Temporarily disable 'intelligent' spacing
 ##    elif sp > 10:
 ##        txt = "     "
@@ -254,15 +277,33 @@ def readerCallback(char, spacing):
 ##        n = int(sp - 0.8) + 2
 ##        txt = n * " "
     elif sp > 5:
-        txt = "     "
+        return WORD_SPACE_TEXT
     else:
         n = int(sp + 0.5)
-        txt = n * " "
-    txt += char
+        return SPACE_TEXT[n] if n > 0 else ""
+
+def readerCallback(char, spacing):
+    """display characters returned from the decoder"""
+    Recorder.record([], '', text=char)
+    if config.code_type == config.CodeType.american:
+        sp = (spacing - 0.25) / 1.25  # adjust for American Morse spacing
+    else:
+        sp = spacing
+    txt = __spacing_text(sp, char) + char
     ka.trigger_reader_append_text(txt)
     if char == "=":
         ka.trigger_reader_append_text("\n")
 
+def __sounder():
+    """
+    Sound the code queued from the key and circuit closer.
+
+    Called from the 'KOB-Sounder' thread.
+    """
+    while True:
+        code, code_source = __sounder_q.get()
+        KOB.soundCode(code, code_source)
+
 def reset_wire_state():
     """regain control of the wire"""
     global internet_station_active
@@ -279,6 +320,8 @@ def init():
     KOB = kob.KOB(
             portToUse=config.serial_port, useGpio=config.gpio, interfaceType=config.interface_type,
             useAudio=config.sound, keyCallback=from_key)
+    sounderThread = threading.Thread(name='KOB-Sounder', daemon=True, target=__sounder)
+    sounderThread.start()
     Internet = internet.Internet(config.station, callback=from_internet)
     # Let the user know if 'invert key input' is enabled (typically only used for MODEM input)
     if config.invert_key_input:
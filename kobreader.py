@@ -36,16 +36,38 @@ import kobwindow
 
 kw = None # Must be set from the root window
 
+__pending_text = [] # Text waiting to be added to the window
+__flush_scheduled = False # True if a flush of the pending text is scheduled
+
+def __flush_text():
+    """
+    Add the pending text to the window.
+    """
+    global __flush_scheduled
+    __flush_scheduled = False
+    if __pending_text:
+        # Call Tk directly, this is run for nearly every decoded character
+        txt = kw.txtReader
+        txt.tk.call(txt, 'insert', 'end', ''.join(__pending_text))
+        __pending_text.clear()
+        txt.tk.call(txt, 'see', 'end')
+
 def handle_append_text(event_data):
     """
     Event handler to append text to the window.
+
+    The text is added when the GUI is next idle, so text arriving in quick 
+    succession is inserted into the window at once.
     """
-    text = event_data
-    kw.txtReader.insert('end', text)
-    kw.txtReader.see('end')
+    global __flush_scheduled
+    __pending_text.append(event_data)
+    if not __flush_scheduled:
+        __flush_scheduled = True
+        kw.root.after_idle(__flush_text)
 
 def handle_clear(event_data):
     """
     Event handler to clear the contents.
     """
+    __pending_text.clear()
     kw.txtReader.delete('1.0', 'end')
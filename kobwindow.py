@@ -181,6 +181,7 @@ class KOBWindow:
                 lfm3, width=6, height=10, bd=2,
                 relief=tk.SUNKEN, bg='white')
         self.cvsConnect.grid(row=0, column=2)
+        self.rectConnect = self.cvsConnect.create_rectangle(0, 0, 20, 20, fill='white')
         tk.Canvas(lfm3, width=1, height=2).grid(row=1, column=1)
         self.btnConnect = tk.Button(lfm3, text='Connect', command=ka.doConnect)
         self.btnConnect.grid(row=2, columnspan=3, ipady=2, sticky='EW')
@@ -195,13 +196,9 @@ class KOBWindow:
         self.root.bind(kobevents.EVENT_CIRCUIT_OPEN, ka.handle_circuit_open)
         
         #### Emit code sequence (from KEY)
-        ### self.root.bind(kobevents.EVENT_EMIT_KEY_CODE, ka.handle_emit_key_code)
-        cmd = root.register(ka.handle_emit_key_code)
-        root.tk.call("bind", root, kobevents.EVENT_EMIT_KEY_CODE, cmd + " %d")
+        self.root.bind(kobevents.EVENT_EMIT_KEY_CODE, ka.handle_emit_key_code)
         #### Emit code sequence (from KB (keyboard))
-        ### self.root.bind(kobevents.EVENT_EMIT_KB_CODE, ka.handle_emit_kb_code)
-        cmd = root.register(ka.handle_emit_kb_code)
-        root.tk.call("bind", root, kobevents.EVENT_EMIT_KB_CODE, cmd + " %d")
+        self.root.bind(kobevents.EVENT_EMIT_KB_CODE, ka.handle_emit_kb_code)
         #### Current Sender and Station List
         self.root.bind(kobevents.EVENT_STATIONS_CLEAR, ka.handle_clear_stations)
         ### self.root.bind(kobevents.EVENT_CURRENT_SENDER, ka.handle_sender_update)
@@ -213,9 +210,7 @@ class KOBWindow:
 
         #### Reader
         self.root.bind(kobevents.EVENT_READER_CLEAR, ka.handle_reader_clear)
-        ### self.root.bind(kobevents.EVENT_APPEND_TEXT, krdr.handle_append_text)
-        cmd = root.register(ka.handle_reader_append_text)
-        root.tk.call("bind", root, kobevents.EVENT_READER_APPEND_TEXT, cmd + " %d")
+        self.root.bind(kobevents.EVENT_READER_APPEND_TEXT, ka.handle_reader_append_text)
 
         # Finally, show the window in its full glory
         root.update()                      # Make sure window size reflects changes so far
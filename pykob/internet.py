@@ -46,6 +46,8 @@ shortPacketFormat = struct.Struct("<hh")  # cmd, wire
 idPacketFormat = struct.Struct("<hh 128s 4x i i 8x 208x 128s 8x")  # cmd, byts, id, seq, idflag, ver
 codePacketFormat = struct.Struct("<hh 128s 4x i 12x 51i i 128s 8x")  # cmd, byts, id, seq, code list, n, txt
 
+codePadding = 51 * (0,)  # unused code list elements in a code packet
+
 NUL = '\x00'
 
 class Internet:
@@ -136,11 +138,10 @@ class Internet:
         if n > 50:
             log.warn("PyKOB.internet: code sequence too long: {0}".format(n))
             return
-        codeBuf = code + (51-n)*(0,) + (n, txt.encode(encoding='latin-1'))
         self.sentSeqNo += 1
         codePacket = codePacketFormat.pack(
                 DAT, 492, self.officeID.encode('latin-1'),
-                self.sentSeqNo, *codeBuf)
+                self.sentSeqNo, *code, *codePadding[n:], n, txt.encode(encoding='latin-1'))
         for i in range(2):
             self.socket.sendto(codePacket, self.address)
 
@@ -153,7 +154,7 @@ class Internet:
         try:
             self.address = socket.getaddrinfo(self.host, self.port, socket.AF_INET,
                     socket.SOCK_DGRAM)[0][4]
-        except:
+        except (OSError, UnicodeError):  # socket.gaierror, or an invalid host name
             log.info("PyKOB.internet ignoring DNS lookup error")
         if self.wireNo:
             shortPacket = shortPacketFormat.pack(CON, self.wireNo)
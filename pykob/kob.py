@@ -43,11 +43,23 @@ from pykob import audio, config, log
 DEBOUNCE  = 0.015  # time to ignore transitions due to contact bounce (sec)
 CODESPACE = 0.120  # amount of space to signal end of code sequence (sec)
 CKTCLOSE  = 0.800  # length of mark to signal circuit closure (sec)
+KEYWAIT   = 0.005  # longest time to wait for a key change notification before reading the key (sec)
 
 if sys.platform == 'win32':
     from ctypes import windll
     windll.winmm.timeBeginPeriod(1)  # set clock resoluton to 1 ms (Windows only)
 
+# On Linux a key wait thread can block in the serial driver until the DSR (key)
+# line changes, so the key read thread doesn't need to poll it every millisecond (Linux only).
+TIOCMIWAIT = None
+if sys.platform.startswith('linux'):
+    try:
+        import fcntl
+        import termios
+        TIOCMIWAIT = termios.TIOCMIWAIT
+    except (ImportError, AttributeError):
+        TIOCMIWAIT = None
+
 @unique
 class CodeSource(IntEnum):
     local = 1
@@ -68,13 +80,13 @@ class KOB:
             try:
                 from gpiozero import LED, Button
                 gpioModuleAvailable = True
-            except:
+            except ImportError:
                 log.err("Module 'gpiozero' is not available. GPIO interface cannot be used.")
         if portToUse and not gpioModuleAvailable:
             try:
                 import serial
                 serialModuleAvailable = True
-            except:
+            except ImportError:
                 log.err("Module pySerial is not available. Serial interface cannot be used.")
 
         self.tCodeSounded = -1.0  # Keep track of when the code was first sounded
@@ -127,9 +139,9 @@ class KOB:
                 self.useSerialIn = False
                 self.useSerialOut = False
                 log.info("Interface for key and/or sounder on serial port '{}' not available. Key and sounder will not function.".format(portToUse))
-        self.tLastSdr = time.time()  # time of last sounder transition
+        self.tLastSdr = time.perf_counter()  # time of last sounder transition (monotonic)
         time.sleep(0.5)
-        self.tLastKey = time.time()  # time of last key transition
+        self.tLastKey = time.perf_counter()  # time of last key transition (monotonic)
         self.circuitClosed = self.keyIsClosed  # True: circuit latched closed
         self.energizeLoop(self.circuitClosed, False)
         #
@@ -137,9 +149,16 @@ class KOB:
         if config.interface_type == config.InterfaceType.loop and not config.sounder:
             self.energizeLoop(False, False)
         self.__recorder = None
+        self.__keyWaitAvailable = self.useSerialIn and TIOCMIWAIT is not None
+        self.__keyChanged = threading.Event()
         if self.keyCallback:
+            if self.__keyWaitAvailable:
+                keywaitThread = threading.Thread(name='KOB-KeyWait', daemon=True, target=self.callbackKeyWait)
+                keywaitThread.start()
             keyreadThread = threading.Thread(name='KOB-KeyRead', daemon=True, target=self.callbackKeyRead)
             keyreadThread.start()
+        else:
+            self.__keyWaitAvailable = False
         powersaveThread = threading.Thread(name='KOB-PowerSave', daemon=True, target=self.callbackPowerSave)
         powersaveThread.start()
 
@@ -170,6 +189,20 @@ class KOB:
                     self.keyCloserOpen(True)
             self.keyCallback(code)
 
+    def callbackKeyWait(self):
+        """
+        Called by the KeyWait thread `run` to signal the KeyRead thread when the key 
+        (DSR line) changes.
+        """
+        while self.__keyWaitAvailable:
+            try:
+                fcntl.ioctl(self.port.fd, TIOCMIWAIT, termios.TIOCM_DSR)
+            except (OSError, AttributeError):
+                # Not all serial drivers support waiting on the modem lines
+                log.info("Serial port doesn't support waiting for key changes. The key will be polled.")
+                self.__keyWaitAvailable = False
+            self.__keyChanged.set()
+
     def callbackPowerSave(self):
         """
         Called by the PowerSave thread 'run' to control the power save (sounder energize)
@@ -212,6 +245,25 @@ class KOB:
             kc = not kc
         return kc
 
+    def waitForKeyChange(self) -> bool:
+        '''
+        Wait for the KeyWait thread to signal a key change, for at most `KEYWAIT` seconds.
+
+        The wait is bounded because `TIOCMIWAIT` only reports changes made while it 
+        is waiting, so a change made while the KeyWait thread is signalling is missed. 
+        The key must be read after this returns, as the change signal is cleared.
+
+        Return
+        ------
+        waited : bool
+            True if the wait was performed, False if it isn't supported by the
+            interface (the caller must poll the key instead)
+        '''
+        if not self.__keyWaitAvailable:
+            return False
+        self.__keyChanged.wait(KEYWAIT)
+        self.__keyChanged.clear()
+        return True
 
     def energizeLoop(self, energize: bool, fromKey: bool):
         '''
@@ -263,7 +315,7 @@ class KOB:
                 kc = self.keyIsClosed
             except(OSError):
                 return "" # Stop trying to process the key
-            t = time.time()
+            t = time.perf_counter()
             if kc != self.lastKeyState:
                 self.lastKeyState = kc
                 dt = int((t - self.tLastKey) * 1000)
@@ -287,6 +339,10 @@ class KOB:
                 return code
             if len(code) >= 50:  # code sequences can't have more than 50 elements
                 return code
+            if not code and (not kc or self.circuitClosed):
+                # Nothing is being timed, so wait for the key to change
+                if self.waitForKeyChange():
+                    continue
             time.sleep(0.001)
         return ""
 
@@ -299,12 +355,13 @@ class KOB:
             self.tCodeSounded = time.time()
         if self.__recorder and not code_source == CodeSource.player:
             self.__recorder.record(code_source, code)
+        fromKey = code_source == CodeSource.key
         for c in code:
-            t = time.time()
+            t = time.perf_counter()
             if c < -3000:  # long pause, change of senders, or missing packet
                 c = -1
             if c == 1 or c > 2:  # start of mark
-                self.energizeLoop(True, code_source == CodeSource.key)
+                self.energizeLoop(True, fromKey)
             tNext = self.tLastSdr + abs(c) / 1000.
             dt = tNext - t
             if dt <= 0:
@@ -313,7 +370,7 @@ class KOB:
                 self.tLastSdr = tNext
                 time.sleep(dt)
             if c > 1:  # end of (nonlatching) mark
-                self.energizeLoop(False, code_source == CodeSource.key)
+                self.energizeLoop(False, fromKey)
 
     def keyCloserOpen(self, open):
         '''
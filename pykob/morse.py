@@ -30,6 +30,7 @@ Provides classes for sending and reading American and International Morse code.
 
 import sys
 import codecs
+import functools
 from pathlib import Path
 from threading import Timer
 from pykob import config, log
@@ -63,27 +64,42 @@ def readEncodeTable(codeType, filename):
 readEncodeTable(config.CodeType.american, 'codetable-american.txt')
 readEncodeTable(config.code_type.international, 'codetable-international.txt')
 
+@functools.lru_cache(maxsize=64)
+def senderTiming(wpm, cwpm, codeType, spacing):
+    """
+    Return the (dot length, character space, word space) timing in ms used to send 
+    code at a speed, Farnsworth speed, code type and spacing.
+    """
+    if spacing == config.Spacing.none:
+        cwpm = wpm  # send characters at overall code speed
+    else:
+        cwpm = max(wpm, cwpm)  # send at Farnsworth speed
+    dotLen    = int(1200 / cwpm)  # dot length (ms)
+    charSpace = 3 * dotLen  # space between characters (ms)
+    wordSpace = 7 * dotLen  # space between words (ms)
+    if codeType == config.CodeType.american:
+        charSpace += int((60000 / cwpm - dotLen *
+                DOTSPERWORD) / 6)
+        wordSpace = 2 * charSpace
+    delta = 60000 / wpm - 60000 / cwpm  # amount to stretch each word
+    if spacing == config.Spacing.char:
+        charSpace += int(delta / 6)
+        wordSpace += int(delta / 3)
+    elif spacing == config.Spacing.word:
+        wordSpace += int(delta)
+    return (dotLen, charSpace, wordSpace)
+
 class Sender:
     def __init__(self, wpm, cwpm=0, codeType=config.CodeType.american, spacing=config.Spacing.char):
-        self.codeType = codeType
-        if spacing == config.Spacing.none:
-            cwpm = wpm  # send characters at overall code speed
-        else:
-            cwpm = max(wpm, cwpm)  # send at Farnsworth speed
-        self.dotLen    = int(1200 / cwpm)  # dot length (ms)
-        self.charSpace = 3 * self.dotLen  # space between characters (ms)
-        self.wordSpace = 7 * self.dotLen  # space between words (ms)
-        if codeType == config.CodeType.american:
-            self.charSpace += int((60000 / cwpm - self.dotLen *
-                    DOTSPERWORD) / 6)
-            self.wordSpace = 2 * self.charSpace
-        delta = 60000 / wpm - 60000 / cwpm  # amount to stretch each word
-        if spacing == config.Spacing.char:
-            self.charSpace += int(delta / 6)
-            self.wordSpace += int(delta / 3)
-        elif spacing == config.Spacing.word:
-            self.wordSpace += int(delta)
+        self.setWPM(wpm, cwpm, codeType, spacing)
         self.space = self.wordSpace  # delay before next code element (ms)
+
+    def setWPM(self, wpm, cwpm=0, codeType=config.CodeType.american, spacing=config.Spacing.char):
+        """
+        Change the code speed, code type and spacing used to encode characters.
+        """
+        self.codeType = codeType
+        self.dotLen, self.charSpace, self.wordSpace = senderTiming(wpm, cwpm, codeType, spacing)
         
     def encode(self, char, printChar=False):
         c = char.upper()
@@ -236,6 +252,17 @@ class Reader:
         self.dotLen = int(1200. / wpm)
         self.truDot = self.dotLen
 
+    def reset(self, wpm=20, cwpm=0, codeType=config.CodeType.american):
+        """
+        Change the code speed and code type, keeping any code being decoded.
+        """
+        self.codeType = codeType
+        self.setWPM(max(wpm, cwpm))
+        # Restart speed detection from the configured speed
+        self.d_wpm = self.wpm
+        self.d_dotLen = self.dotLen
+        self.d_truDot = self.truDot
+
     def updateDWPM(self, codeSeq):
         for i in range(1, len(codeSeq) - 2, 2):
             minDotLen = int(0.5 * self.d_dotLen)
@@ -44,15 +44,31 @@ devices) have recorded. This class is no exception. It provides methods to play
 recordings in addition to making recordings.
 
 """
+import bisect
 import json
+import mmap
 import queue
+import sys
 import threading
 import time
-from datetime import datetime, timedelta
+from datetime import timedelta
 from enum import Enum, IntEnum, unique
 from pykob import config, kob, log
 from threading import Lock, RLock
 
+INDEX_CHUNK_SIZE = 1<<20  # approximate number of bytes of a recording to index at a time
+
+# Use orjson, if it's installed, to encode and decode the recording packets. It is
+# considerably faster than the standard library json module.
+try:
+    import orjson
+    json_loads = orjson.loads
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+except ImportError:
+    json_loads = json.loads
+    json_dumps = json.dumps
+
 @unique
 class PlaybackState(IntEnum):
     """
@@ -71,7 +87,7 @@ def get_timestamp() -> int:
     ts : number
         milliseconds since the epoc
     """
-    ts = int(time.time() * 1000)
+    ts = time.time_ns() // 1000000
     return ts
     
 def date_time_from_ts(ts: int) -> str:
@@ -85,8 +101,7 @@ def date_time_from_ts(ts: int) -> str:
     dtstr : string
         A string with the date and time
     """
-    dateTime = datetime.fromtimestamp(ts / 1000.0)
-    dateTimeStr = str(dateTime.ctime()) + ": "
+    dateTimeStr = time.ctime(ts // 1000) + ": "
     return dateTimeStr
 
 def hms_from_ts(ts1: int, ts2: int) -> str:
@@ -120,6 +135,9 @@ class Recorder:
             play_station_list_callback=None):
         self.__target_file_path = target_file_path
         self.__source_file_path = source_file_path
+        self.__r_fp = None              # File pointer for the target (record) file, opened on first record
+        self.__r_fileop_lock = Lock()   # Lock to protect the record file from concurrent record calls
+        self.__r_station = (None, "null") # Station ID and its JSON encoding for the record packets
 
         self.__recorder_station_id = station_id
         self.__recorder_wire = wire
@@ -151,6 +169,8 @@ class Recorder:
         self.__p_fts = 0                # First (earliest) timestamp
         self.__p_lts = 0                # Last (latest) timestamp
         self.__p_fpts_index = []        # List of tuples with timestamp, file-position and station-change
+        self.__p_ts_index = []          # List of the index timestamps, to search for a timestamp
+        self.__p_ts_ordered = True      # The timestamps are in order (so they can be bisected)
         self.__p_stations = set()       # Set of all stations in the recording
         self.__p_fp = None              # File pointer for current playback file while playing
         self.__p_pblts = -1             # Playback last timestamp
@@ -196,7 +216,9 @@ class Recorder:
         """
         Set the target file path to record to.
         """
-        self.__target_file_path = target_file_path
+        with self.__r_fileop_lock:
+            self.__close_target_file()
+            self.__target_file_path = target_file_path
 
     @property
     def station_id(self) -> str:
@@ -232,17 +254,47 @@ class Recorder:
         """
         if self.__playback_state == PlaybackState.idle: # Only record if not playing back a recording
             timestamp = get_timestamp()
-            data = {
-                "ts":timestamp,
-                "w":self.wire,
-                "s":self.station_id,
-                "o":source,
-                "t":text,
-                "c":code
-            }
-            with open(self.__target_file_path, "a+") as fp:
-                json.dump(data, fp)
-                fp.write('\n')
+            # The packet always has the same fields, so it is formatted directly rather than 
+            # going through the JSON encoder. Only the strings need to be encoded, and the 
+            # Station ID is only encoded when it changes. The result is the same as 
+            # encoding the dictionary: {"ts","w","s","o","t","c"}
+            # The ID and its encoding are kept in one tuple, which is replaced as a whole, 
+            # as `record` is called from several threads.
+            station_id = self.__recorder_station_id
+            r_station = self.__r_station
+            if not station_id is r_station[0]:
+                r_station = (station_id, json_dumps(station_id))
+                self.__r_station = r_station
+            wire = self.__recorder_wire
+            packet = '{{"ts":{},"w":{},"s":{},"o":{},"t":{},"c":[{}]}}\n'.format(
+                timestamp,
+                '%d' % wire if isinstance(wire, int) else json_dumps(wire),
+                r_station[1],
+                '%d' % source if isinstance(source, int) else json_dumps(source),
+                json_dumps(text) if text else '""',
+                ','.join(map(str, code)))
+            with self.__r_fileop_lock:
+                if not self.__r_fp:
+                    self.__r_fp = open(self.__target_file_path, "a", encoding="utf-8", newline="\n")
+                self.__r_fp.write(packet)
+                self.__r_fp.flush()
+
+    def close(self):
+        """
+        Close the target (record) file. It will be reopened by the next record.
+        """
+        with self.__r_fileop_lock:
+            self.__close_target_file()
+
+    def __close_target_file(self):
+        """
+        Close the target file if it is open. The caller must hold the record file lock.
+        """
+        if self.__r_fp:
+            try:
+                self.__r_fp.close()
+            finally:
+                self.__r_fp = None
 
     def playback_move_seconds(self, seconds: int):
         """
@@ -278,30 +330,56 @@ class Recorder:
                     # Move forward or backward?
                     if seconds > 0:
                         # Forward...
-                        for i in range(current_lineno, indexlen - 1):
-                            nts = self.__p_fpts_index[i][0]
-                            if nts >= target_ts or i == indexlen - 1:
-                                # If we move one line and the timestamp is >= target, we are done
-                                new_pos = self.__p_fpts_index[i][1] # An index entry is [ts,fpos,station-change]
-                                print(" Move forward to line: {} From: {}  Pos: {} From: {}  Timestamp: {} From: {}".format(\
-                                    i, current_lineno, new_pos, current_pos, nts, current_ts))
-                                self.__p_line_no = i
-                                self.__p_fp.seek(new_pos)
-                                self.__p_pblts = nts # set last timestamp to the new timestamp so there isn't a delay when played
-                                break
+                        # If we move one line and the timestamp is >= target, we are done
+                        i = self.__find_ts_forward(current_lineno, indexlen - 1, target_ts)
+                        if i >= 0:
+                            nts, new_pos = self.__p_fpts_index[i][0:2] # An index entry is [ts,fpos,station-change]
+                            print(" Move forward to line: {} From: {}  Pos: {} From: {}  Timestamp: {} From: {}".format(\
+                                i, current_lineno, new_pos, current_pos, nts, current_ts))
+                            self.__p_line_no = i
+                            self.__p_fp.seek(new_pos)
+                            self.__p_pblts = nts # set last timestamp to the new timestamp so there isn't a delay when played
                     else:
                         # Backward...
-                        for i in range(current_lineno, 0, -1):
-                            nts = self.__p_fpts_index[i][0]
-                            if nts <= target_ts or i == 0:
-                                # If we move one line and the timestamp is <= target, we are done
-                                new_pos = self.__p_fpts_index[i][1] # An index entry is [ts,fpos,station-change]
-                                print(" Move backward to line: {} From: {}  Pos: {} From: {}  Timestamp: {} From: {}".format(\
-                                    i, current_lineno, new_pos, current_pos, nts, current_ts))
-                                self.__p_line_no = i
-                                self.__p_fp.seek(new_pos)
-                                self.__p_pblts = nts # set last timestamp to the new timestamp so there isn't a delay when played
-                                break
+                        # If we move one line and the timestamp is <= target, we are done
+                        i = self.__find_ts_backward(1, current_lineno + 1, target_ts)
+                        if i >= 0:
+                            nts, new_pos = self.__p_fpts_index[i][0:2] # An index entry is [ts,fpos,station-change]
+                            print(" Move backward to line: {} From: {}  Pos: {} From: {}  Timestamp: {} From: {}".format(\
+                                i, current_lineno, new_pos, current_pos, nts, current_ts))
+                            self.__p_line_no = i
+                            self.__p_fp.seek(new_pos)
+                            self.__p_pblts = nts # set last timestamp to the new timestamp so there isn't a delay when played
+
+    def __find_ts_forward(self, start: int, end: int, target_ts: int) -> int:
+        """
+        Return the first index entry, from `start` up to (not including) `end`, with 
+        a timestamp >= `target_ts`, or -1 if there isn't one.
+
+        The timestamps are bisected unless they aren't in order.
+        """
+        if self.__p_ts_ordered:
+            i = bisect.bisect_left(self.__p_ts_index, target_ts, start, end)
+            return i if i < end else -1
+        for i in range(start, end):
+            if self.__p_ts_index[i] >= target_ts:
+                return i
+        return -1
+
+    def __find_ts_backward(self, start: int, end: int, target_ts: int) -> int:
+        """
+        Return the last index entry, from `start` up to (not including) `end`, with 
+        a timestamp <= `target_ts`, or -1 if there isn't one.
+
+        The timestamps are bisected unless they aren't in order.
+        """
+        if self.__p_ts_ordered:
+            i = bisect.bisect_right(self.__p_ts_index, target_ts, start, end) - 1
+            return i if i >= start else -1
+        for i in range(end - 1, start - 1, -1):
+            if self.__p_ts_index[i] <= target_ts:
+                return i
+        return -1
 
     def playback_move_to_sender_begin(self):
         """
@@ -440,33 +518,82 @@ class Recorder:
         self.__p_lts = 0
         self.__p_stations.clear()
         self.__p_fpts_index = []
+        self.__p_ts_index = []
+        self.__p_ts_ordered = True
         self.__p_line_no = 0
         self.__p_lines = 0
-        self.__recorder_station_id = None
-        self.__recorder_wire = None
         self.__list_data = list_data
         self.__max_silence = max_silence
         self.__speed_factor = speed_factor
-        #
-        # Get information from the current playback recording file.
-        with open(self.__source_file_path, "r") as fp:
+        # The recording file is read and indexed by the playback thread, so this
+        # returns without waiting for a (possibly large) file to be processed.
+        self.__playback_thread = threading.Thread(name='Recorder-Playback-Play', daemon=True, target=self.callbackPlay)
+        self.__playback_thread.start()
+
+    def __source_lines(self, fp):
+        """
+        Generate the lines of an open (binary) recording file, each with the file position 
+        of the line that follows it.
+
+        The file is memory mapped and split on the newlines if it can be. Otherwise 
+        (for example, an empty file) it is read a chunk of lines at a time.
+        """
+        try:
+            mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            mm = None
+        if mm:
+            with mm:
+                pos = 0
+                size = len(mm)
+                while pos < size:
+                    end = mm.find(b'\n', pos) + 1
+                    if end == 0:
+                        end = size # Last line without a newline
+                    yield mm[pos:end], end
+                    pos = end
+        else:
+            fpos = 0
+            lines = fp.readlines(INDEX_CHUNK_SIZE)
+            while lines:
+                for line in lines:
+                    fpos += len(line) # position of the next line, as `tell()` would return
+                    yield line, fpos
+                # Read the next chunk of lines
+                lines = fp.readlines(INDEX_CHUNK_SIZE)
+
+    def __index_source_file(self) -> bool:
+        """
+        Get information from the current playback recording file and build the
+        index used to move the playback position.
+
+        Return
+        ------
+        ok : bool
+            True if the file was processed, False if there was an error
+        """
+        # Read in binary mode (the JSON decoder accepts bytes). The file positions are
+        # calculated from the line lengths rather than calling `tell()` for each line.
+        with open(self.__source_file_path, "rb", buffering=1<<20) as fp:
             self.__p_fpts_index.append((0,0,False)) # Store line 0 as Time=0, Pos=0, Sender-Change=False
+            self.__p_ts_index.append(0)
             previous_station = None
-            # NOTE: Can't iterate over the file lines as it disables `tell()` and `seek()`.
-            line = fp.readline()
-            while line:
+            previous_ts = None
+            for line, fpos in self.__source_lines(fp):
                 try:
-                    fpos = fp.tell()
-                    data = json.loads(line)
-                    ts = data['ts']
-                    wire = data['w']
-                    station = data['s']
+                    data = json_loads(line)
                     ts = data['ts']
                     station = data['s']
+                    if type(station) is str:
+                        station = sys.intern(station) # The compares with the previous station become identity checks
                     # Store the file position and timestamp in the index to use 
                     # for seeking to a line based on time or line number
                     self.__p_fpts_index.append((ts,fpos,station != previous_station))
+                    self.__p_ts_index.append(ts)
+                    if previous_ts is not None and ts < previous_ts:
+                        self.__p_ts_ordered = False # The clock went backwards during the recording
                     previous_station = station
+                    previous_ts = ts
                     # Get the first and last timestamps from the recording
                     if self.__p_fts == -1 or ts < self.__p_fts:
                         self.__p_fts = ts # Set the 'first' timestamp
@@ -476,20 +603,13 @@ class Recorder:
                     self.__p_lines +=1
                     # Generate the station list from the recording
                     self.__p_stations.add(station)
-                    # Read the next line
-                    line = fp.readline()
                 except Exception as ex:
-                    log.err("Error processing recording file: '{}' Line: {} Error: {}".format(self.__source_file_path, self.__p_line_no, ex))
-                    return
-        # Calculate recording file values to aid playback functions
-        self.__playback_thread = threading.Thread(name='Recorder-Playback-Play', daemon=True, target=self.callbackPlay)
-        self.__playback_thread.start()
-        if self.__play_station_list_callback:
-            self.__p_stations_thread = threading.Thread(name='Recorder-Playback-StationList', daemon=True, target=self.callbackPlayStationList)
-            self.__p_stations_thread.start()
+                    log.err("Error processing recording file: '{}' Line: {} Error: {}".format(self.__source_file_path, self.__p_lines + 1, ex))
+                    return False
         if self.__list_data:
             # Print some values about the recording
             print(" Lines: {}  Start: {}  End: {}  Duration: {}".format(self.__p_lines, date_time_from_ts(self.__p_fts), date_time_from_ts(self.__p_lts), hms_from_ts(self.__p_lts, self.__p_fts)))
+        return True
 
     def callbackPlay(self):
         """
@@ -497,12 +617,19 @@ class Recorder:
         """
         self.__p_line_no = 0
         self.__p_pblts = -1 # Keep the last timestamp
+        self.__player_station_id = None
+        self.__player_wire = None       # So that the first packet reports the wire
 
         try:
             if not self.source_file_path:
                 return
 
             self.__playback_state = PlaybackState.playing
+            if not self.__index_source_file():
+                return
+            if self.__play_station_list_callback:
+                self.__p_stations_thread = threading.Thread(name='Recorder-Playback-StationList', daemon=True, target=self.callbackPlayStationList)
+                self.__p_stations_thread.start()
             #
             # With the information from the recording, call the station callback (if set)
             if self.__list_data:
@@ -512,29 +639,42 @@ class Recorder:
                     print(' Station: ', s)
                 if self.__play_station_list_callback:
                     self.__play_station_list_callback(s)
-            with open(self.__source_file_path, "r") as self.__p_fp:
-                with self.__p_fileop_lock:
+            # Factor to scale the code timing by, if the speed is being changed
+            sf = None if self.__speed_factor == 100 else 100.0 / self.__speed_factor
+            # These don't change during a playback, so keep them in locals for the loop.
+            list_data = self.__list_data
+            max_silence = self.__max_silence
+            play_wire_callback = self.__play_wire_callback
+            play_sender_id_callback = self.__play_sender_id_callback
+            play_code_callback = self.__play_code_callback
+            fileop_lock = self.__p_fileop_lock
+            resume_flag = self.__playback_resume_flag
+            stop_flag = self.__playback_stop_flag
+            list_sec = -1   # Second (timestamp // 1000) of the last listed line
+            list_dts = ""   # Date-Time string of the last listed line
+            with open(self.__source_file_path, "rb") as self.__p_fp:
+                readline = self.__p_fp.readline
+                with fileop_lock:
                     # NOTE: Can't iterate over the file lines as it disables `tell()` and `seek()`.
-                    line = self.__p_fp.readline()
+                    line = readline()
                     self.__p_line_no += 1
                 while line:
                     # Get the file lock and read the contents of the line
-                    with self.__p_fileop_lock:
+                    with fileop_lock:
                         while self.__playback_state == PlaybackState.paused:
-                            self.__playback_resume_flag.wait() # Wait for playback to be resumed
+                            resume_flag.wait() # Wait for playback to be resumed
                             self.__playback_state = PlaybackState.playing
-                        if self.__playback_stop_flag.is_set():
+                        if stop_flag.is_set():
                             # Playback stop was requested
                             self.__playback_state = PlaybackState.idle
-                            self.__playback_resume_flag.clear()
+                            resume_flag.clear()
                             return
-                        data = json.loads(line)
+                        data = json_loads(line)
                         #
-                        code = data['c']        # Code sequence
-                        ts = data['ts']         # Timestamp
-                        wire = data['w']        # Wire number
-                        station = data['s']     # Station ID
-                        source = data['o']      # Source/Origin (numeric value from kob.CodeSource)
+                        # Code sequence, Timestamp, Wire number, Station ID
+                        code, ts, wire, station = data['c'], data['ts'], data['w'], data['s']
+                        if type(station) is str:
+                            station = sys.intern(station) # Same object as the current player station if unchanged
                         pblts = self.__p_pblts
                         self.__p_pblts = ts
                         # Done with lock
@@ -542,53 +682,61 @@ class Recorder:
                     try:
                         if pblts < 0:
                             pblts = ts
-                        if self.__list_data:
-                            print(date_time_from_ts(ts), line, end='')
+                        if list_data:
+                            # The Date-Time string only changes once a second
+                            if not ts // 1000 == list_sec:
+                                list_sec = ts // 1000
+                                list_dts = date_time_from_ts(ts)
+                            print(list_dts, line.decode('utf-8', 'replace'), end='')
                         if code == []:  # Ignore empty code packets
                             continue
-                        codePause = -code[0] / 1000.0  # delay since end of previous code sequence and beginning of this one
+                        codePause = -code[0]  # delay (ms) since end of previous code sequence and beginning of this one
                         # For short pauses (< 2 sec), `KOB.sounder` can handle them more precisely.
                         # However the way `KOB.sounder` handles longer pauses, although it makes sense for
                         # real-time transmissions, is flawed for playback. Better to handle long pauses here.
-                        # A pause of 0x3777 ms is a special case indicating a discontinuity and requires special
+                        # A pause of 32767 (0x7FFF) ms is a special case indicating a discontinuity and requires special
                         # handling in `KOB.sounder`.
                         #
                         # Also check for station change code sequence. If so, pause for recorded timestamp difference
                         if self.__playback_state == PlaybackState.playing:
                             pause = 0
-                            if codePause == 32.767 and len(code) > 1 and code[1] == 2:
+                            if codePause == 32767 and len(code) > 1 and code[1] == 2:
                                 # Probable sender change. See if it is...
                                 if not station == self.__player_station_id:
-                                    if self.__list_data:
+                                    if list_data:
                                         print("Sender change.")
-                                    pause = round((ts - pblts)/1000, 4)
-                            elif codePause > 2.0 and codePause < 32.767:
+                                    pause = (ts - pblts) / 1000
+                            elif 2000 < codePause < 32767:
                                 # Long pause in sent code
-                                pause = round((((ts - pblts)/1000) - 2.0), 4) # Subtract 2 seconds so kob has some to handle
+                                pause = (ts - pblts - 2000) / 1000 # Subtract 2 seconds so kob has some to handle
                                 code[0] = -2000  # Change pause in code sequence to 2 seconds since the rest is handled
                             if pause > 0:
                                 # Long pause or a station/sender change.
                                 # For very long delays, sleep a maximum of `max_silence` seconds
-                                if self.__max_silence > 0 and pause > self.__max_silence:
-                                    if self.__list_data:
-                                        print("Realtime pause of {} seconds being reduced to {} seconds".format(pause, self.__max_silence))
-                                    pause = self.__max_silence
-                                time.sleep(pause)
-                        if not self.__speed_factor == 100:
-                            sf = 1.0 / (self.__speed_factor / 100.0)
-                            code[:] = [round(sf * c) if (c < 0 or c > 2) and c != -32767 else c for c in code]
-                        self.wire = wire
-                        if self.__play_wire_callback:
-                            self.__play_wire_callback(wire)
+                                if max_silence > 0 and pause > max_silence:
+                                    if list_data:
+                                        print("Realtime pause of {} seconds being reduced to {} seconds".format(pause, max_silence))
+                                    pause = max_silence
+                                if stop_flag.wait(pause):
+                                    continue # Playback stop was requested, handled at the top of the loop
+                        if sf:
+                            code = [round(sf * c) if (c < 0 or c > 2) and c != -32767 else c for c in code]
+                        # Only report the wire when it changes. The sender is reported for every 
+                        # packet, as the consumer's current sender can change during playback 
+                        # (for example, by local keying).
+                        if not wire == self.__player_wire:
+                            self.__player_wire = wire
+                            if play_wire_callback:
+                                play_wire_callback(wire)
                         self.__player_station_id = station
-                        if self.__play_sender_id_callback:
-                            self.__play_sender_id_callback(station)
-                        if self.__play_code_callback:
-                            self.__play_code_callback(code)
+                        if play_sender_id_callback:
+                            play_sender_id_callback(station)
+                        if play_code_callback:
+                            play_code_callback(code)
                     finally:
                         # Read the next line to be ready to continue the processing loop.
-                        with self.__p_fileop_lock:
-                            line = self.__p_fp.readline()
+                        with fileop_lock:
+                            line = readline()
                             self.__p_line_no += 1
         finally:
             self.__playback_stop_flag.set()